@@ -1,5 +1,8 @@
 import ctypes
+import gc
+import sys
 import typing as t
+import weakref
 from pathlib import Path
 
 import pytest
@@ -95,11 +98,16 @@ def struct() -> Struct:
 
 
 @pytest.fixture()
-def lib() -> TestLib:
+def lib_path() -> Path:
     path = Path(__file__).parent.joinpath("testlib/target/debug/libtestlib.so")
     if not path.exists():
         pytest.fail("Unable to load FFI")
-    return cdll_from_spec(path, TestLib)
+    return path
+
+
+@pytest.fixture()
+def lib(lib_path: Path) -> TestLib:
+    return cdll_from_spec(lib_path, TestLib)
 
 
 def test_read(struct: Struct) -> None:
@@ -139,6 +147,25 @@ def test_defaults() -> None:
     assert StructWithDefaults().b == 200
 
 
+def test_init_arguments() -> None:
+    s = Struct(1, b=2)
+    assert s.a == 1
+    assert s.b == 2
+    assert StructWithDefaults(b=1).a == 100
+
+    with pytest.raises(TypeError):
+        Struct(1, 2, 3)  # type: ignore
+
+    with pytest.raises(TypeError):
+        Struct(1, a=2)  # type: ignore
+
+    with pytest.raises(TypeError):
+        Struct(missing=1)  # type: ignore
+
+    assert Struct.__init__.__module__ == Struct.__module__
+    assert Struct.__init__.__qualname__ == "Struct.__init__"
+
+
 def test_nested_struct() -> None:
     s = NestedStruct.zeroed()
 
@@ -178,6 +205,58 @@ def test_nested_struct_assigment() -> None:
     assert s.a is not replacement
     assert s.a.struct() is not replacement.struct()
 
+    # Assignment must not touch the neighbouring field
+    s.b = StructWithDefaults()
+    assert s.b.a == 100
+    assert s.b.b == 200
+    assert s.a.a == 1
+
+    with pytest.raises(TypeError):
+        s.a = StructWithDefaults()  # type: ignore
+
+    # Subclasses with a different layout must not be copied byte for byte
+    class BigEndianStruct(Struct, little_endian=False):
+        pass
+
+    with pytest.raises(TypeError):
+        s.a = BigEndianStruct(1, 2)
+
+    class LargerStruct(Struct):
+        c: Uint32
+
+    with pytest.raises(TypeError):
+        s.a = LargerStruct(1, 2, 3)
+
+
+def test_shared_struct_layout() -> None:
+    class SameLayout(CStruct):
+        a: Uint8
+        b: Uint8
+
+    class OtherPacking(CStruct, pack=True):
+        a: Uint8
+        b: Uint8
+
+    raw = Uint8Tuple.zeroed().struct()
+    assert SameLayout._struct_cls is Uint8Tuple._struct_cls  # type: ignore  # pyright: ignore[reportPrivateUsage]
+    assert OtherPacking._struct_cls is not Uint8Tuple._struct_cls  # type: ignore  # pyright: ignore[reportPrivateUsage]
+    assert SameLayout.from_struct(raw).a == 0  # type: ignore
+
+    # Different layouts must be distinguishable in ctypes errors
+    assert type(raw).__name__ == "_CStructLayout(a: c_ubyte, b: c_ubyte)"
+    assert type(OtherPacking.zeroed().struct()).__name__ != type(raw).__name__
+
+
+def test_shared_struct_layout_collected() -> None:
+    class Local(CStruct):
+        a: Uint16
+        b: Uint64
+
+    ref = weakref.ref(Local._struct_cls)  # pyright: ignore[reportPrivateUsage]
+    del Local
+    gc.collect()
+    assert ref() is None
+
 
 def test_zeroed_bypass_defaults() -> None:
     assert StructWithDefaults.zeroed().a == 0
@@ -196,6 +275,44 @@ def test_missing(struct: Struct) -> None:
         struct.missing  # type: ignore  # noqa: B018
 
 
+def test_as_array() -> None:
+    np = pytest.importorskip("numpy")
+
+    class PackedStruct(CStruct, pack=True):
+        a: Uint32
+        b: Uint8
+
+    arr = NestedStruct.as_array(3)
+    assert arr.shape == (3,)
+    assert arr.dtype.itemsize == NestedStruct.sizeof()
+
+    packed = PackedStruct.as_array(2)
+    assert packed.dtype.itemsize == PackedStruct.sizeof() == 5
+
+    arr["a"]["a"] += 1
+    arr["b"]["b"] = np.arange(3)
+    assert arr["a"]["a"].tolist() == [1, 1, 1]
+    assert arr["a"]["b"].tolist() == [0, 0, 0]
+    assert arr["b"]["b"].tolist() == [0, 1, 2]
+
+    # The backing ctypes array shares memory with the NumPy array
+    raw = arr.base.obj
+    assert raw[2].b.b == 2
+
+
+def test_buffer() -> None:
+    s = Uint8Tuple(1, 2)
+    view = s.buffer()
+    assert bytes(view) == bytes(s.struct())
+
+    # The view must share memory with the struct
+    view.cast("B")[0] = 3
+    assert s.a == 3
+
+    if sys.version_info >= (3, 12):
+        assert bytes(memoryview(s)) == b"\x03\x02"
+
+
 def test_endianess() -> None:
     class LE(CStruct, little_endian=True):
         v: Uint32
@@ -250,6 +367,20 @@ def test_deep_inheritance() -> None:
     parent.uint = 666
     assert parent.uint == 666
 
+    parent = Parent()  # type: ignore
+    assert parent.uint == 0
+    assert parent.char == 0
+
+    parent = Parent(1, 2)
+    assert parent.uint == 1
+    assert parent.char == 2
+
+    class ChildWithDefaults(StructWithDefaults):
+        pass
+
+    assert ChildWithDefaults().a == 100
+    assert ChildWithDefaults(b=1).b == 1
+
 
 @pytest.mark.parametrize(
     "invalid_type",
@@ -269,6 +400,22 @@ def test_invalid_types(invalid_type: type[t.Any]) -> None:
             invalid_field: invalid_type  # type: ignore[valid-type]
 
 
+@pytest.mark.parametrize("name", ["from", "my-field", "1st"])
+def test_invalid_field_names(name: str) -> None:
+    with pytest.raises(TypeError):
+        type("InvalidStruct", (CStruct,), {"__annotations__": {name: Uint32}})
+
+    # Nested structs don't use generated setters, but still end up in __init__
+    with pytest.raises(TypeError):
+        type("InvalidStruct", (CStruct,), {"__annotations__": {name: Struct}})
+
+
+@pytest.mark.parametrize("name", ["_struct", "_struct_cls", "_pointer"])
+def test_reserved_field_names(name: str) -> None:
+    with pytest.raises(TypeError):
+        type("ReservedStruct", (CStruct,), {"__annotations__": {name: Uint32}})
+
+
 @pytest.mark.parametrize(
     ("type_", "expected"),
     [
@@ -289,6 +436,12 @@ def test_shared_object_typing(lib: TestLib) -> None:
     assert u8_tuple.a == 69
     assert u8_tuple.b == 42
 
+    # The pointer is reused, and must still target the struct
+    assert u8_tuple.byref() is u8_tuple.byref()
+    lib.swap_u8_tuple(u8_tuple.byref())
+    assert u8_tuple.a == 42
+    assert u8_tuple.b == 69
+
     assert lib.sub_u8(2, 1) == 1
     assert lib.sub_u16(69, 42) == 27
     assert lib.sub_u32(1_000_000_000, 400_000_000) == 600_000_000
@@ -313,3 +466,57 @@ def test_shared_object_typing(lib: TestLib) -> None:
     t.assert_type(lib.sub_f32(1.0, 1.0), float)
     t.assert_type(lib.sub_f64(1.0, 1.0), float)
     t.assert_type(lib.swap_u8_tuple(u8_tuple.byref()), None)
+
+
+def test_missing_parameter_annotation(lib_path: Path) -> None:
+    class InvalidLib:
+        @staticmethod
+        def sub_u8(x: Uint8, y, /) -> Uint8:  # type: ignore  # noqa: ANN001
+            raise NotImplementedError
+
+    with pytest.raises(TypeError):
+        cdll_from_spec(lib_path, InvalidLib)
+
+
+def test_spec_inheritance(lib_path: Path) -> None:
+    class BaseLib:
+        @staticmethod
+        def sub_u8(x: Uint8, y: Uint8, /) -> Uint8:
+            raise NotImplementedError
+
+        # Wrong signedness, which the subclass fixes
+        @staticmethod
+        def sub_i8(x: Uint8, y: Uint8, /) -> Uint8:
+            raise NotImplementedError
+
+    class ChildLib(BaseLib):
+        @staticmethod
+        def sub_i8(x: Int8, y: Int8, /) -> Int8:
+            raise NotImplementedError
+
+        @staticmethod
+        def sub_u16(x: Uint16, y: Uint16, /) -> Uint16:
+            raise NotImplementedError
+
+    child_lib = cdll_from_spec(lib_path, ChildLib)
+    assert child_lib.sub_u8(2, 1) == 1
+    assert child_lib.sub_i8(1, 2) == -1
+    assert child_lib.sub_u16(69, 42) == 27
+
+    base_lib = cdll_from_spec(lib_path, BaseLib)
+    assert base_lib.sub_i8(1, 2) == 255
+    assert not hasattr(base_lib, "sub_u16")
+
+
+def test_numba_call(lib: TestLib) -> None:
+    numba = pytest.importorskip("numba")
+    sub_u32 = lib.sub_u32
+
+    @numba.njit  # type: ignore
+    def total(n: int) -> int:
+        acc = 0
+        for i in range(n):
+            acc += sub_u32(i + 1, i)
+        return acc
+
+    assert total(10) == 10
@@ -1,7 +1,9 @@
 import contextlib
 import ctypes
 import dataclasses
-import inspect
+import keyword
+import operator
+import sys
 import types
 import typing as t
 from pathlib import Path
@@ -43,37 +45,68 @@ VoidPointer = t.Annotated[int | None, ctypes.c_void_p]
 
 def cdll_from_spec(path: Path, spec: type[T]) -> T:
     # The given spec must be a class
-    assert inspect.isclass(spec)
-
-    # Find all methods that non-internal methods
-    spec_funcs = [
-        type_
-        for name, type_ in inspect.getmembers(spec)
-        if not name.startswith("__") and inspect.isfunction(type_)
-    ]
+    assert isinstance(spec, type)
+
+    # Find all non-internal methods, letting subclasses override their bases
+    members: dict[str, t.Any] = {}
+    for klass in reversed(spec.__mro__):
+        members.update(vars(klass))
+    spec_funcs = list[types.FunctionType]()
+    for name, member in members.items():
+        if name.startswith("__"):
+            continue
+        func = member.__func__ if isinstance(member, staticmethod) else member
+        if isinstance(func, types.FunctionType):
+            spec_funcs.append(func)
 
     # There has to be at least one function in the spec, or it's likely an error
     assert spec_funcs
 
     lib = ctypes.CDLL(t.cast(str, path))
+    bound = _BoundLibrary(lib)
     for spec_func in spec_funcs:
-        # Inspect the signature of the spec function
-        sig = inspect.signature(spec_func)
+        # Positional and keyword parameter names come first in co_varnames
+        code = spec_func.__code__
+        param_names = code.co_varnames[: code.co_argcount + code.co_kwonlyargcount]
+        annotations = spec_func.__annotations__
 
         # Apply the types to the lib's function
         lib_func = getattr(lib, spec_func.__name__)
-        lib_func.argtypes = [
-            CTypeAnnotation.from_annotated_type(p.annotation).c_type
-            for p in sig.parameters.values()
-        ]
-        if sig.return_annotation is not sig.empty:
-            lib_func.restype = CTypeAnnotation.from_annotated_type(
-                sig.return_annotation
-            ).c_type
-        else:
-            lib_func.restype = None
+        argtypes = []
+        for name in param_names:
+            if name not in annotations:
+                raise TypeError(
+                    f"Parameter {name!r} of {spec_func.__qualname__} has no type "
+                    "annotation"
+                )
+            argtypes.append(
+                CTypeAnnotation.from_annotated_type(annotations[name]).c_type
+            )
+        lib_func.argtypes = argtypes
+        lib_func.restype = CTypeAnnotation.from_annotated_type(
+            annotations.get("return")
+        ).c_type
+
+        # Store the function on the instance so calls skip CDLL.__getattr__
+        setattr(bound, spec_func.__name__, lib_func)
+
+    return t.cast(T, bound)
+
+
+class _BoundLibrary:
+    """
+    Holds the configured functions of a shared library as plain instance attributes.
+    """
+
+    _lib: ctypes.CDLL
+
+    def __init__(self, lib: ctypes.CDLL) -> None:
+        # Keep a reference to the library so it isn't unloaded
+        self._lib = lib
 
-    return t.cast(T, lib)
+    def __repr__(self) -> str:
+        name = self._lib._name  # pyright: ignore[reportPrivateUsage]
+        return f"<{self.__class__.__name__} {name!r}>"
 
 
 @dataclasses.dataclass(frozen=True)
@@ -86,69 +119,118 @@ class CTypeAnnotation:
         if type_ is None:
             return cls(None, None)
 
-        # We need this hack so StructPointer isn't interpreted as a catch all
-        ns = types.SimpleNamespace()
-        ns.StructPointer = StructPointer
-
-        origin = t.get_origin(type_)
-        match origin:
-            case t.Annotated:
-                try:
-                    (c_type,) = type_.__metadata__
-                    return cls(type_.__origin__, c_type)
-                except (AttributeError, IndexError):
-                    raise TypeError(
-                        "Type must be a Python type annotated with a ctype, got "
-                        f"{type_!r}"
-                    ) from None
-            case ns.StructPointer:
-                return cls(type_.__args__[0], ctypes.c_void_p)
-            case _ if issubclass(type_, CStruct):
-                return cls(type_, type_._struct_cls)  # pyright: ignore[reportPrivateUsage]
-            case _:
-                raise TypeError(f"Invalid type annotation for C type, got {type_!r}")
-
-
-class _CstructProxyScalarField:
-    name: str
+        # Annotated types are by far the most common, so check for them directly
+        if getattr(type_, "__metadata__", None) is not None:
+            return t.cast(t.Self, _annotation_from_annotated(cls, type_))
 
-    def __init__(self, name: str) -> None:
-        self.name = name
+        handler = _ORIGIN_DISPATCH.get(t.get_origin(type_))
+        if handler is not None:
+            return t.cast(t.Self, handler(cls, type_))
 
-    def __get__(self, instance: t.Any, owner: type[t.Any] | None = None) -> t.Any:
-        return getattr(instance._struct, self.name)
+        if isinstance(type_, type) and issubclass(type_, CStruct):
+            return cls(type_, type_._struct_cls)  # pyright: ignore[reportPrivateUsage]
+
+        raise TypeError(f"Invalid type annotation for C type, got {type_!r}")
+
+
+# Parsed annotations, shared since aliases like Uint32 are used for many fields
+_ANNOTATED_CACHE: dict[tuple[type[CTypeAnnotation], t.Any], CTypeAnnotation] = {}
 
-    def __set__(self, instance: t.Any, value: t.Any) -> None:
-        setattr(instance._struct, self.name, value)
+
+def _annotation_from_annotated(
+    cls: type[CTypeAnnotation], type_: t.Any
+) -> CTypeAnnotation:
+    # Unhashable metadata can't be cached, so a TypeError is treated as a miss. This
+    # avoids contextlib.suppress since this is the hot path for every field
+    try:
+        return _ANNOTATED_CACHE[cls, type_]
+    except (KeyError, TypeError):
+        pass
+
+    try:
+        (c_type,) = type_.__metadata__
+        rv = cls(type_.__origin__, c_type)
+    except (AttributeError, ValueError):
+        raise TypeError(
+            f"Type must be a Python type annotated with a ctype, got {type_!r}"
+        ) from None
+
+    with contextlib.suppress(TypeError):
+        _ANNOTATED_CACHE[cls, type_] = rv
+    return rv
+
+
+def _annotation_from_struct_pointer(
+    cls: type[CTypeAnnotation], type_: t.Any
+) -> CTypeAnnotation:
+    return cls(type_.__args__[0], ctypes.c_void_p)
+
+
+def _check_field_name(name: str) -> None:
+    """
+    Ensure that the field name can be used in generated source code, like
+    dataclasses.make_dataclass does.
+    """
+    if not name.isidentifier():
+        raise TypeError(f"Field names must be valid identifiers: {name!r}")
+    if keyword.iskeyword(name):
+        raise TypeError(f"Field names must not be keywords: {name!r}")
+
+
+def _scalar_field_property(name: str, module: str) -> property:
+    """
+    Create a property that proxies the given field of the underlying struct.
+
+    The getter is an attrgetter so reads don't enter a Python frame. There is no
+    equivalent for setting attributes, so the setter is generated with the field name
+    inlined instead of calling setattr.
+    """
+    _check_field_name(name)
+    namespace: dict[str, t.Any] = {"__name__": module}
+    exec(f"def fset(self, value):\n    self._struct.{name} = value\n", namespace)  # noqa: S102
+    return property(operator.attrgetter(f"_struct.{name}"), namespace["fset"])
 
 
 class _CstructProxyStructField:
+    __slots__ = ("name", "proxy_cls")
+
     name: str
     proxy_cls: t.Any
-    refs: WeakValueDictionary[int, t.Any]
 
     def __init__(self, name: str, proxy_cls: t.Any) -> None:
         self.name = name
         self.proxy_cls = proxy_cls
-        self.refs = WeakValueDictionary()
 
     def __get__(self, instance: t.Any, owner: type[t.Any] | None = None) -> t.Any:
-        oid = id(instance)
-        try:
-            return self.refs[oid]
-        except KeyError:
+        cache = instance._nested_cache
+        proxy = cache.get(self.name)
+        if proxy is None:
             proxy = self.proxy_cls.from_struct(getattr(instance._struct, self.name))
-            self.refs[oid] = proxy
-            return proxy
+            cache[self.name] = proxy
+        return proxy
 
     def __set__(self, instance: t.Any, value: t.Any) -> None:
         setattr(instance._struct, self.name, value._struct)
 
 
+# Generated ctypes structs keyed on base class, packing and fields. Values are weak
+# so structs are freed with the last CStruct class that uses them
+_STRUCT_CACHE: WeakValueDictionary[
+    tuple[type[ctypes.Structure], bool, tuple[tuple[str, type[t.Any]], ...]],
+    type[ctypes.Structure],
+] = WeakValueDictionary()
+
+
 @t.dataclass_transform()
 class CStruct:
+    __slots__ = ("_struct", "_nested_cache", "_pointer")
+
     _struct_cls: "t.ClassVar[type[RawStruct[t.Self]]]"
+    _fields_tuple: t.ClassVar[tuple[str, ...]]
+    _field_defaults: t.ClassVar[dict[str, t.Any]]
     _struct: "RawStruct[t.Self]"
+    _nested_cache: dict[str, t.Any]
+    _pointer: t.Any
 
     def __init_subclass__(
         cls,
@@ -167,74 +249,78 @@ class CStruct:
 
         defaults: dict[str, t.Any] = {}
         fields = list[tuple[str, type[t.Any]]]()
+        struct_fields = set[str]()
         for attr, type_ in t.get_type_hints(cls, include_extras=True).items():
-            if attr in {"_struct_cls", "_struct"}:
+            # CStruct's own annotations are internals, not fields. Subclasses may not
+            # redeclare them, since silently dropping a field would change the layout
+            if attr in _RESERVED_ATTRS:
+                if any(
+                    attr in vars(klass).get("__annotations__", {})
+                    for klass in cls.__mro__
+                    if klass is not CStruct
+                ):
+                    raise TypeError(f"{attr} is reserved by CStruct")
                 continue
 
+            # Annotations created at runtime may use non-interned strings, which makes
+            # attribute lookups on the ctypes struct fall back to full comparisons
+            attr = sys.intern(attr)  # noqa: PLW2901
+
             annotation = CTypeAnnotation.from_annotated_type(type_)
 
             if annotation.py_type is None or annotation.c_type is None:
                 raise TypeError(f"{attr} must not be of type None")
 
-            # Save the default value if it was defined
-            with contextlib.suppress(AttributeError):
-                defaults[attr] = getattr(cls, attr)
+            # Save the default value if it was defined. Fields inherited from a parent
+            # struct have already been replaced by proxies, so their default is taken
+            # from the parent's saved defaults instead
+            for klass in cls.__mro__:
+                if attr not in vars(klass):
+                    continue
+                value = vars(klass)[attr]
+                if isinstance(value, property | _CstructProxyStructField):
+                    parent_defaults = vars(klass).get("_field_defaults", {})
+                    if attr in parent_defaults:
+                        defaults[attr] = parent_defaults[attr]
+                else:
+                    defaults[attr] = value
+                break
 
             if issubclass(annotation.py_type, CStruct):
                 setattr(cls, attr, _CstructProxyStructField(attr, annotation.py_type))
+                struct_fields.add(attr)
             else:
-                setattr(cls, attr, _CstructProxyScalarField(attr))
+                setattr(cls, attr, _scalar_field_property(attr, cls.__module__))
             fields.append((attr, annotation.c_type))
 
-        cls._struct_cls = t.cast(  # type: ignore # mypy
-            type[RawStruct[t.Self]],
-            type(
-                f"_{cls.__name__}_ctypes_struct",
-                (base_cls,),
-                {
-                    "_pack_": pack,
-                    "_fields_": list(fields),
-                },
-            ),
-        )
+        # Structs with identical layouts share the same ctypes.Structure, since creating
+        # one is expensive
+        struct_key = (base_cls, pack, tuple(fields))
+        struct_cls = _STRUCT_CACHE.get(struct_key)
+        if struct_cls is None:
+            # Only set _pack_ when packing, since NumPy treats _pack_ = 0 as a pack size
+            struct_attrs: dict[str, t.Any] = {"_fields_": list(fields)}
+            if pack:
+                struct_attrs["_pack_"] = 1
 
-        def __init__(self: CStruct, *args: t.Any, **kwargs: t.Any) -> None:  # noqa: N807
-            self._struct = self._struct_cls()  # type: ignore # pyright
+            # The struct may be shared, so it's named after its layout not this class
+            struct_cls = type(
+                _layout_name(base_cls, pack, fields), (base_cls,), struct_attrs
+            )
+            _STRUCT_CACHE[struct_key] = struct_cls
 
-            if len(args) > len(fields):
-                raise TypeError(
-                    f"{self.__class__.__name__}() takes {len(fields)} positional "
-                    f"argument{'s' if len(fields) > 1 else ''} but {len(args)} were "
-                    "given"
-                )
+        cls._struct_cls = t.cast(type[RawStruct[t.Self]], struct_cls)  # type: ignore # mypy
 
-            for attr, value in defaults.items():
-                setattr(self, attr, value)
-
-            used_args = set[str]()
-            for arg, (attr, _) in zip(args, fields, strict=False):
-                used_args.add(attr)
-                setattr(self, attr, arg)
-
-            available_attrs = {attr for attr, _ in fields}
-            for attr, value in kwargs.items():
-                if attr in used_args:
-                    raise TypeError(
-                        f"{self.__class__.__name__}() got multiple values for argument "
-                        f"{attr!r}"
-                    )
-                if attr not in available_attrs:
-                    raise TypeError(
-                        f"{self.__class__.__name__}() got an unexpected keyword "
-                        f"argument {attr!r}"
-                    )
-                setattr(self, attr, value)
+        cls._fields_tuple = tuple(attr for attr, _ in fields)
+        cls._field_defaults = defaults
+        cls.__init__ = _create_init(cls, defaults, struct_fields)  # type: ignore
 
         def __repr__(self: CStruct) -> str:  # noqa: N807
-            fields_repr = [f"{attr}={getattr(self, attr)!r}" for attr, _ in fields]
+            fields_repr = [
+                f"{attr}={getattr(self, attr)!r}" for attr in self._fields_tuple
+            ]
             return f"{self.__class__.__name__}({', '.join(fields_repr)})"
 
-        cls.__init__ = __init__  # type: ignore
         cls.__repr__ = __repr__  # type: ignore
 
     @classmethod
@@ -247,27 +333,72 @@ class CStruct:
         """Equivalent to calling ctypes.sizeof for the underlying struct"""
         return ctypes.sizeof(cls._struct_cls)
 
+    @classmethod
+    def as_array(cls, count: int) -> t.Any:
+        """
+        Return a zeroed NumPy structured array of count structs.
+
+        The array is backed by a ctypes array of the underlying struct, so each field
+        can be read and written for all rows at once, e.g. arr["a"] += 1. Requires
+        NumPy to be installed.
+
+        Only the NumPy array is returned. It keeps the ctypes array alive, which can be
+        reached as arr.base.obj if it needs to be passed to an FFI function.
+        """
+        import numpy as np  # type: ignore
+
+        buf = (cls._struct_cls * count)()
+        return np.frombuffer(memoryview(buf), dtype=np.dtype(cls._struct_cls))
+
     @classmethod
     def from_struct(cls, struct: "RawStruct[t.Self]") -> t.Self:
         """
         Create an instance of this struct using, backed by the given struct instance.
 
         If the given struct is not the same as the expected one a TypeError is raised.
+        Struct classes with identical fields, packing and endianness share the same
+        underlying struct type.
         """
         if not isinstance(struct, cls._struct_cls):
-            raise TypeError(f"Expected {cls._struct_cls}, got {type(struct)}")
+            raise TypeError(
+                f"Expected {cls._struct_cls} for {cls.__name__}, got {type(struct)}"
+            )
 
         rv = cls.__new__(cls)
         rv._struct = struct
+        rv._nested_cache = {}
+        rv._pointer = None
         return rv
 
     def struct(self) -> "RawStruct[t.Self]":
         return self._struct  # type: ignore
 
+    def buffer(self) -> memoryview:
+        """
+        Return a writable memoryview of the underlying struct without copying it.
+
+        On Python 3.12+ the struct itself can be passed to memoryview() instead.
+        """
+        return memoryview(self._struct)
+
+    def __buffer__(self, flags: int) -> memoryview:
+        return memoryview(self._struct)
+
     def byref_raw(self) -> t.Any:
-        return ctypes.byref(self._struct)  # type: ignore
+        """
+        Return a pointer to the underlying struct for passing to FFI functions.
+
+        The pointer is created on first use and the same object is returned by every
+        later call on this instance. It must not be modified, e.g. by assigning to its
+        contents, since that would change what later calls point to.
+        """
+        pointer = self._pointer
+        if pointer is None:
+            pointer = self._pointer = ctypes.pointer(self._struct)
+        return pointer
 
     def byref(self) -> "StructPointer[t.Self]":
+        """Typed version of byref_raw(), the same shared pointer is returned"""
         return self.byref_raw()  # type: ignore
 
     def __eq__(self, other: object) -> bool:
@@ -282,11 +413,90 @@ class CStruct:
 T_struct = t.TypeVar("T_struct", bound=CStruct)
 
 
+def _layout_name(
+    base_cls: type[ctypes.Structure],
+    pack: bool,
+    fields: list[tuple[str, type[t.Any]]],
+) -> str:
+    """
+    Name a generated ctypes struct after its layout, e.g. _CStructLayout(a: c_uint).
+    """
+    parts = [f"{attr}: {c_type.__name__}" for attr, c_type in fields]
+    if pack:
+        parts.append("pack=1")
+    # LittleEndianStructure is Structure on little endian platforms and vice versa
+    if base_cls is not ctypes.Structure:
+        if base_cls is ctypes.BigEndianStructure:
+            parts.append("big_endian")
+        else:
+            parts.append("little_endian")
+    return f"_CStructLayout({', '.join(parts)})"
+
+
+# Internal attributes of CStruct that are not struct fields
+_RESERVED_ATTRS = frozenset(CStruct.__annotations__)
+
+# Sentinel for fields that were not given to __init__
+_MISSING = object()
+
+
+def _create_init(
+    cls: type[CStruct],
+    defaults: dict[str, t.Any],
+    struct_fields: set[str],
+) -> t.Callable[..., None]:
+    """
+    Generate an __init__ for the given struct class with every field as a parameter.
+
+    Fields without a default are left zeroed unless they are given. Nested structs
+    are assigned through their descriptor so the bytes are copied into place.
+    """
+    fields = cls._fields_tuple  # pyright: ignore[reportPrivateUsage]
+    self_name = "__cstruct_self__" if "self" in fields else "self"
+    namespace: dict[str, t.Any] = {
+        # Gives the generated function the module of the class, like dataclasses
+        "__name__": cls.__module__,
+        "__cstruct_struct_cls__": cls._struct_cls,  # pyright: ignore[reportPrivateUsage]
+        "__cstruct_missing__": _MISSING,
+    }
+
+    params = [self_name]
+    body = [
+        f"    {self_name}._struct = __cstruct_raw__ = __cstruct_struct_cls__()",
+        f"    {self_name}._nested_cache = {{}}",
+        f"    {self_name}._pointer = None",
+    ]
+    for attr in fields:
+        _check_field_name(attr)
+        target = (
+            f"{self_name}.{attr}"
+            if attr in struct_fields
+            else f"__cstruct_raw__.{attr}"
+        )
+        if attr in defaults:
+            default_name = f"__cstruct_default_{attr}__"
+            namespace[default_name] = defaults[attr]
+            params.append(f"{attr}={default_name}")
+            body.append(f"    {target} = {attr}")
+        else:
+            params.append(f"{attr}=__cstruct_missing__")
+            body.append(f"    if {attr} is not __cstruct_missing__:")
+            body.append(f"        {target} = {attr}")
+
+    source = f"def __init__({', '.join(params)}):\n" + "\n".join(body) + "\n"
+    exec(source, namespace)  # noqa: S102
+
+    init = namespace["__init__"]
+    init.__qualname__ = f"{cls.__qualname__}.__init__"
+    return t.cast(t.Callable[..., None], init)
+
+
 class RawStruct(t.Generic[T], ctypes.Structure):
     """
     A type annotation struct that is used to represent a raw ctypes.Structure in a way
-    that's typed for the CStruct. This allows us to ensure that the correct raw struct
-    is passed.
+    that's typed for the CStruct. This allows type checkers to ensure that the correct
+    raw struct is passed. At runtime CStruct classes with identical layouts share the
+    same raw struct type, so only the layout is checked.
     """
 
 
@@ -295,3 +505,10 @@ class StructPointer(t.Generic[T_struct]):
     A type annotation struct that is used to represent when a pointer is expected in an
     FFI function call.
     """
+
+
+_ORIGIN_DISPATCH: dict[
+    t.Any, t.Callable[[type[CTypeAnnotation], t.Any], CTypeAnnotation]
+] = {
+    StructPointer: _annotation_from_struct_pointer,
+}